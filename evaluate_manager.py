@@ -47,7 +47,7 @@ def evaluate_manager(episodes: int, model_name: str, battle_model_path: str, use
         # Episode finished
         progress = env.current_trainer_idx
         win = progress >= max_trainers
-        survivors = len([m for m in env.roster if m.alive])
+        survivors = env.alive_count
         
         if win:
             wins += 1
@@ -0,0 +1,52 @@
+import io
+import os
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Optional
+from stable_baselines3.common.callbacks import CheckpointCallback
+
+class AsyncCheckpointCallback(CheckpointCallback):
+    """
+    CheckpointCallback that writes checkpoints on a background thread.
+    The model is serialized into memory on the training thread (so the
+    snapshot is consistent), only the disk write is offloaded.
+    At most one write is in flight: if the previous one hasn't finished,
+    the new checkpoint is skipped instead of piling up on a slow disk.
+    """
+    def __init__(self, save_freq: int, save_path: str, name_prefix: str = "rl_model", verbose: int = 0):
+        super(AsyncCheckpointCallback, self).__init__(save_freq, save_path, name_prefix=name_prefix, verbose=verbose)
+        self._saver = ThreadPoolExecutor(max_workers=1)
+        self._pending: Optional[Future] = None
+
+    def _on_step(self) -> bool:
+        if self.n_calls % self.save_freq == 0:
+            if self._pending is not None and not self._pending.done():
+                if self.verbose >= 2:
+                    print("Previous checkpoint still writing, skipping this one")
+                return True
+            self.wait()
+
+            model_path = self._checkpoint_path(extension="zip")
+            buffer = io.BytesIO()
+            self.model.save(buffer)
+            self._pending = self._saver.submit(self._write, model_path, buffer.getvalue())
+            if self.verbose >= 2:
+                print(f"Saving model checkpoint to {model_path}")
+        return True
+
+    def _on_training_end(self) -> None:
+        self.wait()
+
+    def wait(self):
+        # Surfaces write errors (disk full etc.) on the training thread
+        if self._pending is not None:
+            pending, self._pending = self._pending, None
+            pending.result()
+
+    @staticmethod
+    def _write(path: str, data: bytes):
+        # Write to a temp file first so a crash never leaves a truncated zip
+        # for get_latest_checkpoint to resume from
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
@@ -1,6 +1,14 @@
-import numpy as np
+from collections import deque
 from stable_baselines3.common.callbacks import BaseCallback
 
+# Metrics logged as-is: info["metrics"] key -> TensorBoard tag (built once)
+# trainer_idx: logs the current one, step-by-step, rather than max seen
+_PASSTHROUGH_TAGS = {
+    "pokemon_fainted": "custom/pokemon_fainted",
+    "opponent_fainted": "custom/opponent_fainted",
+    "trainer_idx": "custom/trainer_idx",
+}
+
 class MetricsCallback(BaseCallback):
     """
     Custom callback for logging additional metrics to TensorBoard.
@@ -13,8 +21,12 @@ class MetricsCallback(BaseCallback):
         super(MetricsCallback, self).__init__(verbose)
         self.episode_rewards = []
         self.episode_lengths = []
-        self.wins = []
-        self.turns = []
+        # Rolling 100 windows with running sums: O(1) per episode instead of
+        # slicing/averaging an ever-growing list
+        self.wins = deque(maxlen=100)
+        self.turns = deque(maxlen=100)
+        self._win_sum = 0.0
+        self._turn_sum = 0.0
         
     def _on_step(self) -> bool:
         # Check for info dicts in locals
@@ -31,22 +43,21 @@ class MetricsCallback(BaseCallback):
             if "metrics" in info:
                 metrics = info["metrics"]
                 if "win" in metrics:
+                    if len(self.wins) == self.wins.maxlen:
+                        self._win_sum -= self.wins[0]
                     self.wins.append(metrics["win"])
-                    self.logger.record("custom/win_rate", np.mean(self.wins[-100:])) # Rolling 100
+                    self._win_sum += metrics["win"]
+                    self.logger.record("custom/win_rate", self._win_sum / len(self.wins)) # Rolling 100
                     
                 if "turns" in metrics:
+                    if len(self.turns) == self.turns.maxlen:
+                        self._turn_sum -= self.turns[0]
                     self.turns.append(metrics["turns"])
-                    self.logger.record("custom/avg_turns", np.mean(self.turns[-100:]))
-                    
-                if "pokemon_fainted" in metrics:
-                    self.logger.record("custom/pokemon_fainted", metrics["pokemon_fainted"])
-                    
-                if "opponent_fainted" in metrics:
-                    self.logger.record("custom/opponent_fainted", metrics["opponent_fainted"])
+                    self._turn_sum += metrics["turns"]
+                    self.logger.record("custom/avg_turns", self._turn_sum / len(self.turns))
                     
-                if "trainer_idx" in metrics:
-                    # Track max trainer reached in this rollout/episode
-                    # Since we get step-by-step, we can just log the current one or max seen
-                    self.logger.record("custom/trainer_idx", metrics["trainer_idx"])
+                for key, tag in _PASSTHROUGH_TAGS.items():
+                    if key in metrics:
+                        self.logger.record(tag, metrics[key])
                     
         return True
@@ -44,6 +44,7 @@ class RichDashboardCallback(BaseCallback):
         self.live = Live(self.layout, refresh_per_second=4, console=self.console)
         
     def _on_training_start(self):
+        self.update_display() # Initial (empty) panels
         self.live.start() # Start rendering loop
         
     def _on_training_end(self):
@@ -51,6 +52,7 @@ class RichDashboardCallback(BaseCallback):
         
     def _on_step(self) -> bool:
         infos = self.locals.get("infos", [])
+        changed = False
         for info in infos:
             if "metrics" in info:
                 m = info["metrics"]
@@ -64,11 +66,15 @@ class RichDashboardCallback(BaseCallback):
                     self.current_trainer_idx = t_idx
                     dead = m.get("pokemon_fainted", 0)
                     self.recent_battles.append(f"Trainer {t_idx} | {res} | Dead: {dead}")
+                    changed = True
                     
             # Track Roster Usage (Need to extract from somewhere? Maybe info?)
             # Ideally the env would pass 'selected_party' in info.
             
-        self.update_display()
+        # Only rebuild the panels when a battle finished; Live keeps redrawing
+        # the current layout on its own thread
+        if changed:
+            self.update_display()
         return True
 
     def update_display(self):
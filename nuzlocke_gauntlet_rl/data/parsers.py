@@ -1,15 +1,68 @@
 import pandas as pd
+import functools
+import hashlib
+import inspect
 import math
+import os
 import re
 from typing import List, Optional, Dict, Tuple
+from nuzlocke_gauntlet_rl.utils.disk_cache import cache_path, load_pickle, save_pickle
+from nuzlocke_gauntlet_rl.utils import specs
 from nuzlocke_gauntlet_rl.utils.specs import PokemonSpec, TrainerSpec, GauntletSpec
 
+TRAINER_ORDER_PATH = "data/Default Mode Bosses v4.1 (with EVs) - Radical Red - Trainer Order.csv"
+KANTO_LEADERS_PATH = "data/Default Mode Bosses v4.1 (with EVs) - Radical Red - Kanto Leaders.csv"
+INDIGO_LEAGUE_PATH = "data/Default Mode Bosses v4.1 (with EVs) - Radical Red - Indigo League.csv"
+TEAM_ROCKET_PATH = "data/Default Mode Bosses v4.1 (with EVs) - Radical Red - Team Rocket.csv"
+BOSS_FILES = [
+    KANTO_LEADERS_PATH,
+    INDIGO_LEAGUE_PATH,
+    TEAM_ROCKET_PATH,
+    "data/Default Mode Bosses v4.1 (with EVs) - Radical Red - Rivals.csv",
+    "data/Default Mode Bosses v4.1 (with EVs) - Radical Red - Mini Bosses.csv",
+    "data/Default Mode Bosses v4.1 (with EVs) - Radical Red - Johto Leaders.csv"
+]
+
+def disk_cached(*source_paths: str):
+    """
+    Caches a loader's result in memory and as a pickle in the user cache dir.
+    The pickle is reused while it is newer than every source file (the given
+    paths, any str arguments of the call, this module and specs.py, whose
+    models are pickled without re-validation), so env workers skip the
+    pandas parse after the first run.
+    """
+    def decorator(fn):
+        sig = inspect.signature(fn)
+        
+        @functools.lru_cache(maxsize=None)
+        def cached(*args, **kwargs):
+            bound = sig.bind(*args, **kwargs)
+            bound.apply_defaults()
+            sources = [__file__, specs.__file__, *source_paths] + [v for v in bound.arguments.values() if isinstance(v, str)]
+            try:
+                source_mtime = max(os.path.getmtime(p) for p in sources)
+            except FileNotFoundError:
+                return fn(*args, **kwargs) # Let the loader report the missing file
+                
+            key = hashlib.md5(repr(sorted(bound.arguments.items())).encode()).hexdigest()[:12]
+            path = cache_path(f"{fn.__name__}_{key}.pkl")
+            result = load_pickle(path, newer_than=source_mtime)
+            if result is not None:
+                return result
+                
+            result = fn(*args, **kwargs)
+            save_pickle(path, result)
+            return result
+            
+        return functools.wraps(fn)(cached)
+    return decorator
+
 def load_trainer_order() -> List[Tuple[str, str, int]]:
     """
     Parses 'Default Mode Bosses v4.1 (with EVs) - Radical Red - Trainer Order.csv'
     Returns a list of (trainer_name, location, level_cap).
     """
-    path = "data/Default Mode Bosses v4.1 (with EVs) - Radical Red - Trainer Order.csv"
+    path = TRAINER_ORDER_PATH
     try:
         df = pd.read_csv(path, header=None)
     except FileNotFoundError:
@@ -190,14 +243,7 @@ def load_all_trainers() -> List[TrainerSpec]:
         k = f"{normalize_text(name)}|{normalize_text(loc)}"
         level_lookup[k] = cap
 
-    files = [
-        "data/Default Mode Bosses v4.1 (with EVs) - Radical Red - Kanto Leaders.csv",
-        "data/Default Mode Bosses v4.1 (with EVs) - Radical Red - Indigo League.csv",
-        "data/Default Mode Bosses v4.1 (with EVs) - Radical Red - Team Rocket.csv",
-        "data/Default Mode Bosses v4.1 (with EVs) - Radical Red - Rivals.csv",
-        "data/Default Mode Bosses v4.1 (with EVs) - Radical Red - Mini Bosses.csv",
-        "data/Default Mode Bosses v4.1 (with EVs) - Radical Red - Johto Leaders.csv"
-    ]
+    files = BOSS_FILES
     
     all_specs = []
     for f in files:
@@ -206,6 +252,7 @@ def load_all_trainers() -> List[TrainerSpec]:
             
     return all_specs
 
+@disk_cached(TRAINER_ORDER_PATH, *BOSS_FILES)
 def load_complete_gauntlet() -> GauntletSpec:
     final_gauntlet_list = []
     
@@ -283,24 +330,28 @@ def load_complete_gauntlet() -> GauntletSpec:
     return GauntletSpec(trainers=final_gauntlet_list)
 
 
+@disk_cached(KANTO_LEADERS_PATH)
 def load_kanto_leaders() -> GauntletSpec:
-    path = "data/Default Mode Bosses v4.1 (with EVs) - Radical Red - Kanto Leaders.csv"
+    path = KANTO_LEADERS_PATH
     trainers = parse_boss_csv(path)
     return GauntletSpec(trainers=trainers)
 
+@disk_cached(INDIGO_LEAGUE_PATH)
 def load_indigo_league() -> GauntletSpec:
-    path = "data/Default Mode Bosses v4.1 (with EVs) - Radical Red - Indigo League.csv"
+    path = INDIGO_LEAGUE_PATH
     trainers = parse_boss_csv(path)
     return GauntletSpec(trainers=trainers)
 
+@disk_cached(TEAM_ROCKET_PATH)
 def load_team_rocket() -> GauntletSpec:
-    path = "data/Default Mode Bosses v4.1 (with EVs) - Radical Red - Team Rocket.csv"
+    path = TEAM_ROCKET_PATH
     trainers = parse_boss_csv(path)
     return GauntletSpec(trainers=trainers)
 
 def load_extended_gauntlet() -> GauntletSpec:
     return load_complete_gauntlet() # Alias for now
 
+@disk_cached()
 def load_encounters(file_path: str = "data/Pokémon Locations & Raid Dens v4.1 - Radical Red - Grass & Caves.csv") -> Dict[str, List[Dict]]:
     """
     Parses the Encounter CSV.
@@ -7,6 +7,10 @@ class BattleEnv(SinglesEnv):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.risk_token = 0 # 0: Safe, 1: Balanced, 2: Desperate
+        # Generator API for risk draws. Until reset() gets a seed it is seeded
+        # from the global NumPy RNG, so set_random_seed() keeps runs reproducible
+        self._risk_rng = np.random.default_rng(np.random.randint(2**32, dtype=np.uint32))
+        self._risk_queue = []
         
         # Workaround for SingleAgentWrapper if observation_spaces is missing
         if not hasattr(self, "observation_spaces") or not self.observation_spaces:
@@ -26,12 +30,16 @@ class BattleEnv(SinglesEnv):
         import sys
         
         self._last_fainted = {} # Reset fainted tracking
+        
+        if seed is not None:
+            self._risk_rng = np.random.default_rng(seed)
+            self._risk_queue = []
                     
         if options and "risk_token" in options:
             self.risk_token = options["risk_token"]
         else:
             # Default or random if not specified
-            self.risk_token = np.random.randint(0, 3)
+            self.risk_token = self._next_risk_token()
             
         # Bypass super().reset() because it forces agent1 vs agent2 challenge
         # We want to wait for an external challenge (or one triggered by us externally)
@@ -62,6 +70,13 @@ class BattleEnv(SinglesEnv):
         obs = {self.agent1.username: self.embed_battle(self.battle1)}
         return obs, self.get_additional_info()
 
+    def _next_risk_token(self) -> int:
+        # Draw from shuffled blocks of 8 x (0, 1, 2) instead of i.i.d. so every
+        # 24 battles see each risk level equally often (lower-variance curriculum)
+        if not self._risk_queue:
+            self._risk_queue = self._risk_rng.permutation(np.repeat(np.arange(3), 8)).tolist()
+        return self._risk_queue.pop()
+
     def calc_reward(self, battle: AbstractBattle) -> float:
         reward = 0.0
         
@@ -12,6 +12,7 @@ from nuzlocke_gauntlet_rl.data.parsers import (
     load_team_rocket, 
     load_complete_gauntlet  # Ensure this is available
 )
+from nuzlocke_gauntlet_rl.envs.battle_simulator import BattleSimulator
 from nuzlocke_gauntlet_rl.envs.real_battle_simulator import RealBattleSimulator
 # For testing/mocking, you might conditionally import MockBattleSimulator
 
@@ -40,7 +41,8 @@ class NuzlockeGauntletEnv(gym.Env):
         model_path: str = "models/battle_agent_v1", # Low-level policy
         max_roster_size: int = 400,
         simulator_url: str = "ws://localhost:8000/showdown/websocket",
-        watch_mode: bool = False
+        watch_mode: bool = False,
+        simulator: Optional[BattleSimulator] = None # Prebuilt simulator, overrides model_path
     ):
         super().__init__()
         
@@ -100,7 +102,9 @@ class NuzlockeGauntletEnv(gym.Env):
         })
         
         # Simulator
-        if not model_path:
+        if simulator is not None:
+             self.simulator = simulator
+        elif not model_path:
              from nuzlocke_gauntlet_rl.envs.mock_battle_simulator import MockBattleSimulator
              self.simulator = MockBattleSimulator()
         else:
@@ -118,6 +122,12 @@ class NuzlockeGauntletEnv(gym.Env):
         
         # Internal State
         self.roster: List[MonInstance] = []
+        self.alive_count = 0 # Alive roster members, kept in sync by _add_to_roster/_faint
+        # Roster columns (SoA), indexed like self.roster, so roster-wide checks
+        # are NumPy expressions instead of loops over MonInstance objects
+        self.alive_mask = np.zeros(self.max_roster_size, dtype=bool) # alive_mask[i] <=> roster[i].alive
+        self.party_mask = np.zeros(self.max_roster_size, dtype=bool) # party_mask[i] <=> roster[i] in party
+        self._roster_pos: Dict[int, int] = {} # id(mon) -> roster index
         self.current_trainer_idx = 0
         self.visited_routes: Set[str] = set()
         self.party: List[MonInstance] = [] # Current ACTIVE party
@@ -138,6 +148,10 @@ class NuzlockeGauntletEnv(gym.Env):
         
         # 1. Initialize Roster with Starter
         self.roster = [] # Empty Roster
+        self.alive_count = 0
+        self.alive_mask[:] = False
+        self.party_mask[:] = False
+        self._roster_pos = {}
         
         # 2. Process Initial Unlocks (None)
         # User requested 2nd encounter ONLY after first fight.
@@ -166,9 +180,9 @@ class NuzlockeGauntletEnv(gym.Env):
             # Support 0-26 (Gen 1-9 starters)
             starter = self.mechanics.get_starter_choice(choice_idx)
             if starter:
-                self.roster.append(starter)
+                self._add_to_roster(starter)
             else:
-                self.roster.append(self.mechanics.get_starter_choice(1)) # Check your bounds!
+                self._add_to_roster(self.mechanics.get_starter_choice(1)) # Check your bounds!
                 
             self.current_phase = self.PHASE_DECISION
             return self._get_obs(), 0, False, False, {"metrics": {}}
@@ -185,6 +199,7 @@ class NuzlockeGauntletEnv(gym.Env):
                  self.current_slot = 0
                  self.build_party_specs = []
                  self.party = [] # Clear old party
+                 self.party_mask[:] = False
                  
             else: # FIGHT (0)
                  # Executed when agent is confident
@@ -196,7 +211,7 @@ class NuzlockeGauntletEnv(gym.Env):
              # Action is Roster Index
              if 0 <= action < len(self.roster):
                  mon = self.roster[action] # Get instance
-                 if mon.alive and mon not in self.party: 
+                 if self.alive_mask[action] and not self.party_mask[action]: 
                      # Start building this Mon
                      self.build_current_mon = mon
                      self.build_current_moves = []
@@ -235,11 +250,10 @@ class NuzlockeGauntletEnv(gym.Env):
                          
                  self.build_current_mon.spec.moves = self.build_current_moves
                  self.party.append(self.build_current_mon)
+                 self.party_mask[self._roster_pos[id(self.build_current_mon)]] = True
                  
                  # Check if team full OR no more roster candidates
-                 available = [m for m in self.roster if m not in self.party and m.alive]
-                 
-                 if len(self.party) >= 6 or not available:
+                 if len(self.party) >= 6 or not self._selectable_members().any():
                      # Done building. Return to DECISION
                      self.current_phase = self.PHASE_DECISION
                  else:
@@ -274,7 +288,7 @@ class NuzlockeGauntletEnv(gym.Env):
          for i, survived in enumerate(survivors):
              if i < len(self.party):
                  if not survived:
-                     self.party[i].alive = False
+                     self._faint(self.party[i])
                      deaths += 1
                      
          # Rewards
@@ -294,7 +308,7 @@ class NuzlockeGauntletEnv(gym.Env):
                      mon = self.mechanics.roll_encounter(r, self.roster)
                      if mon: 
                          # print(f"Captured {mon.spec.species} on {r}!")
-                         self.roster.append(mon)
+                         self._add_to_roster(mon)
              
              self.current_trainer_idx += 1
              if self.current_trainer_idx >= len(self.gauntlet_template.trainers):
@@ -307,7 +321,7 @@ class NuzlockeGauntletEnv(gym.Env):
          reward -= (deaths * 0.1)
          
          # Check Roster Wipe (Redundant if Loss=Terminated, but safe)
-         if not any(m.alive for m in self.roster):
+         if self.alive_count == 0:
              terminated = True
              reward -= 5.0
              
@@ -329,6 +343,31 @@ class NuzlockeGauntletEnv(gym.Env):
          }
          return self._get_obs(), reward, terminated, False, info
 
+    def _add_to_roster(self, mon: MonInstance):
+        pos = len(self.roster)
+        if pos >= len(self.alive_mask):
+            # Double the columns if a run ever outgrows them
+            self.alive_mask = np.concatenate([self.alive_mask, np.zeros(len(self.alive_mask), dtype=bool)])
+            self.party_mask = np.concatenate([self.party_mask, np.zeros(len(self.party_mask), dtype=bool)])
+        self.roster.append(mon)
+        self._roster_pos[id(mon)] = pos
+        self.alive_mask[pos] = mon.alive
+        if mon.alive:
+            self.alive_count += 1
+
+    def _faint(self, mon: MonInstance):
+        # A mon kept in the party after dying can "faint" again next battle;
+        # only count the first one
+        if mon.alive:
+            mon.alive = False
+            self.alive_count -= 1
+            self.alive_mask[self._roster_pos[id(mon)]] = False
+
+    def _selectable_members(self) -> np.ndarray:
+        """Bool mask over the roster: alive and not already in the party."""
+        n = len(self.roster)
+        return self.alive_mask[:n] & ~self.party_mask[:n]
+
     def valid_action_mask(self):
         mask = np.zeros(self.action_space_size, dtype=bool)
         
@@ -343,9 +382,8 @@ class NuzlockeGauntletEnv(gym.Env):
              
         elif self.current_phase == self.PHASE_SELECT_MEMBER:
              # Mask valid roster indices
-             for i, m in enumerate(self.roster):
-                 if m.alive and m not in self.party:
-                     mask[i] = True
+             selectable = self._selectable_members()
+             mask[:len(selectable)] = selectable
                      
         elif self.current_phase == self.PHASE_SELECT_MOVE:
              # Mask valid move IDs for current mon
@@ -400,7 +438,7 @@ class NuzlockeGauntletEnv(gym.Env):
             "phase": self.current_phase,
             "slot_idx": self.current_slot,
             "trainer_idx": self.current_trainer_idx,
-            "roster_count": sum(1 for m in self.roster if m.alive),
+            "roster_count": self.alive_count,
             "party_levels": party_levels,
             "opponent_preview": opp_preview
         }
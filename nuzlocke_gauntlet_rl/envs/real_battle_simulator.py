@@ -1,8 +1,11 @@
 import asyncio
+import logging
 import numpy as np
 import threading
 import time
-from typing import List, Tuple
+import traceback
+import torch
+from typing import Dict, List, Optional, Tuple
 from stable_baselines3 import PPO
 from poke_env.player import RandomPlayer, SimpleHeuristicsPlayer
 from nuzlocke_gauntlet_rl.players.radical_red_player import RadicalRedPlayer
@@ -16,16 +19,46 @@ import uuid
 import os
 from nuzlocke_gauntlet_rl.utils.moveset_generator import MovesetGenerator
 
+logger = logging.getLogger(__name__)
+
 # Dummy Teambuilder for parsing
 class ParsingTeambuilder(Teambuilder):
     def yield_team(self):
         return None
 
+def load_battle_model(model_path: str, device: str = "auto") -> Tuple[PPO, bool]:
+    """Loads a battle agent zip. Returns (model, is_recurrent)."""
+    logger.info("Loading model from %s (device=%s)...", model_path, device)
+    try:
+        from sb3_contrib import RecurrentPPO
+    except ImportError:
+        model = PPO.load(model_path, device=device)
+        logger.info("Loaded PPO model (sb3-contrib not found).")
+        return model, False
+        
+    # Try loading as RecurrentPPO first. A plain PPO zip fails RecurrentPPO's
+    # policy check (ValueError) or its state dict load (RuntimeError/KeyError);
+    # anything else (missing file, Ctrl-C) propagates
+    try:
+        model = RecurrentPPO.load(model_path, device=device)
+        logger.info("Loaded RecurrentPPO model.")
+        return model, True
+    except (ValueError, RuntimeError, KeyError) as e:
+        logger.debug("Not a RecurrentPPO model (%s), loading as PPO", e)
+    model = PPO.load(model_path, device=device)
+    logger.info("Loaded PPO model.")
+    return model, False
+
 class RealBattleSimulator(BattleSimulator):
     """
     Runs battles using a trained RL agent and a local Showdown server.
     """
-    def __init__(self, model_path: str, server_url: str = "ws://192.168.1.122:8000/showdown/websocket", device: str = "auto"):
+    def __init__(self, model_path: str, server_url: str = "ws://192.168.1.122:8000/showdown/websocket", device: str = "auto", battle_model: Optional[Tuple[PPO, bool]] = None):
+        """
+        battle_model: (model, is_recurrent) from load_battle_model. Pass the same
+        tuple to several simulators in one process to share a single copy of the
+        weights; model_path/device are then not loaded again.
+        """
         self.server_config = ServerConfiguration(server_url, None)
         
         # Create unique IDs
@@ -57,6 +90,13 @@ class RealBattleSimulator(BattleSimulator):
         from nuzlocke_gauntlet_rl.wrappers.single_agent_battle_wrapper import MySingleAgentWrapper
         self.env = MySingleAgentWrapper(self.pz_env, opponent=self.opponent)
         
+        # Resolve once which object plays our side: its team gets set and it
+        # receives the challenge every battle
+        self.agent = getattr(self.pz_env, "agent1", None)
+        if self.agent is None:
+            logger.warning("Could not find agent1 on pz_env, using pz_env for team and challenges.")
+            self.agent = self.pz_env
+        
         # [THREADING FIX] Create a persistent background loop for the opponent
         self.thread_loop = asyncio.new_event_loop()
         def _run_loop(loop):
@@ -67,28 +107,32 @@ class RealBattleSimulator(BattleSimulator):
         self.loop_thread.start()
         
         # Load Model
-        print(f"Loading model from {model_path} (device={device})...")
-        try:
-            from sb3_contrib import RecurrentPPO
-            # Try loading as RecurrentPPO first
-            try:
-                self.model = RecurrentPPO.load(model_path, device=device)
-                self.is_recurrent = True
-                print("Loaded RecurrentPPO model.")
-            except:
-                self.model = PPO.load(model_path, device=device)
-                self.is_recurrent = False
-                print("Loaded PPO model.")
-        except ImportError:
-            self.model = PPO.load(model_path, device=device)
-            self.is_recurrent = False
-            print("Loaded PPO model (sb3-contrib not found).")
+        if battle_model is None:
+            battle_model = load_battle_model(model_path, device)
+        self.model, self.is_recurrent = battle_model
+            
+        # Frame-stacked MlpPolicy models (train_battle_agent VecFrameStack) expect
+        # n_stack concatenated observations; older single-frame models give 1.
+        self.n_stack = 1
+        if not self.is_recurrent:
+            self.n_stack = max(1, self.model.observation_space.shape[-1] // self.env.observation_space.shape[-1])
         
         self.teambuilder = ParsingTeambuilder()
+        # Showdown string -> packed enemy team. Gauntlet teams are fixed, so each
+        # trainer's team is only parsed/packed the first time it is fought.
+        # The player's team changes almost every battle and is never cached.
+        self._packed_enemy_cache: Dict[str, str] = {}
         
     def _pack_team(self, team_str: str) -> str:
         return self.teambuilder.join_team(self.teambuilder.parse_showdown_team(team_str))
 
+    def _pack_enemy_team(self, team_str: str) -> str:
+        packed = self._packed_enemy_cache.get(team_str)
+        if packed is None:
+            packed = self._pack_team(team_str)
+            self._packed_enemy_cache[team_str] = packed
+        return packed
+
     def _sanitize_team(self, team: List[PokemonSpec]):
         """Ensures all Pokemon have an ability (required for poke-env)."""
         for p in team:
@@ -109,70 +153,28 @@ class RealBattleSimulator(BattleSimulator):
         
         # Pack teams
         my_packed = self._pack_team(my_team_str)
-        enemy_packed = self._pack_team(enemy_team_str)
+        enemy_packed = self._pack_enemy_team(enemy_team_str)
         
-        print(f"DEBUG: My Team (Packed): {my_packed[:50]}...")
+        logger.debug("My Team (Packed): %s...", my_packed[:50])
         
         # Update teams using ConstantTeambuilder
         self.opponent._team = ConstantTeambuilder(enemy_packed)
         
         # Update agent team
-        if hasattr(self.pz_env, "agent1"):
-             self.pz_env.agent1._team = ConstantTeambuilder(my_packed)
-        else:
-             print("WARNING: Could not find agent1 on pz_env to set team.")
-             self.pz_env._team = ConstantTeambuilder(my_packed)
+        self.agent._team = ConstantTeambuilder(my_packed)
 
-        # Start background thread to trigger challenge
-        # We use the persistent loop now
-        def challenge_trigger():
-            tid = threading.get_ident()
-            # print(f"[{tid}] Challenge Trigger: Sleeping 0.5s...", flush=True) 
-            time.sleep(0.5) # Reduced from 2s to optimize throughput
-            print(f"[{tid}] Challenge Trigger: Woke up. Scheduling on loop {id(self.thread_loop)}", flush=True)
-            
-            # Find target
-            target = self.pz_env
-            if hasattr(self.pz_env, "agent1"):
-                target = self.pz_env.agent1
-            
-            # Schedule challenge on persistent loop
-            try:
-                print(f"[{tid}] Calling run_coroutine_threadsafe...", flush=True)
-                fut = asyncio.run_coroutine_threadsafe(
-                    self.opponent.battle_against(target, n_battles=1),
-                    self.thread_loop
-                )
-                # Check for immediate errors (with a small timeout, or just log if it fails later)
-                # We can add a done callback to log errors
-                def log_error(future):
-                    try:
-                        future.result()
-                        print(f"[{tid}] Challenge Future Completed Successfully.", flush=True)
-                    except Exception as e:
-                        err_msg = f"[{tid}] Async challenge failed: {repr(e)}\n{traceback.format_exc()}"
-                        print(err_msg, flush=True)
-                        with open("sim_error.log", "a") as f:
-                            f.write(err_msg + "\n")
-                        
-                fut.add_done_callback(log_error)
-                print(f"[{tid}] Callback added.", flush=True)
-                
-            except Exception as e:
-                 err_msg = f"[{tid}] Challenge trigger logic failed: {repr(e)}\n{traceback.format_exc()}"
-                 print(err_msg, flush=True)
-                 with open("sim_error.log", "a") as f:
-                     f.write(err_msg + "\n")
-
-        t = threading.Thread(target=challenge_trigger, daemon=True)
-        t.start()
+        # Schedule the challenge on the persistent loop. The short delay that used
+        # to live in a throwaway thread is now an asyncio.sleep on that loop, so no
+        # thread is created per battle.
+        fut = asyncio.run_coroutine_threadsafe(self._delayed_challenge(self.agent), self.thread_loop)
+        fut.add_done_callback(self._log_challenge_error)
              
         # Monitor removed
 
         # Reset and run
-        print("Calling self.env.reset()...", flush=True)
+        logger.debug("Calling self.env.reset()...")
         obs, info = self.env.reset(options={"risk_token": risk_token})
-        print("self.env.reset() returned.", flush=True)
+        logger.debug("self.env.reset() returned.")
         
         if print_url:
             # Try to get battle tag/URL
@@ -194,14 +196,26 @@ class RealBattleSimulator(BattleSimulator):
         lstm_states = None
         episode_start = np.ones((1,), dtype=bool)
         
-        while not (done or truncated):
-            if self.is_recurrent:
-                action, lstm_states = self.model.predict(obs, state=lstm_states, episode_start=episode_start, deterministic=True)
-                episode_start[0] = False
-            else:
-                action, _ = self.model.predict(obs, deterministic=True)
-                
-            obs, reward, done, truncated, info = self.env.step(action)
+        # Frame stack (zero-padded at battle start, newest frame last, as VecFrameStack)
+        stacked = None
+        if self.n_stack > 1:
+            stacked = np.zeros(self.model.observation_space.shape, dtype=np.float32)
+            frame_dim = obs.shape[-1]
+        
+        # Inference only: also skip the view/version-counter tracking no_grad keeps
+        with torch.inference_mode():
+            while not (done or truncated):
+                if self.is_recurrent:
+                    action, lstm_states = self.model.predict(obs, state=lstm_states, episode_start=episode_start, deterministic=True)
+                    episode_start[0] = False
+                elif stacked is not None:
+                    stacked[:-frame_dim] = stacked[frame_dim:]
+                    stacked[-frame_dim:] = obs
+                    action, _ = self.model.predict(stacked, deterministic=True)
+                else:
+                    action, _ = self.model.predict(obs, deterministic=True)
+                    
+                obs, reward, done, truncated, info = self.env.step(action)
             
         # Battle over.
         # Get result.
@@ -210,7 +224,7 @@ class RealBattleSimulator(BattleSimulator):
              battle = getattr(self.pz_env, "battle", None)
              
         if not battle:
-            print("ERROR: Could not find battle object on pz_env")
+            logger.error("Could not find battle object on pz_env")
             return False, [False]*len(my_team), {"turns": 0, "opponent_fainted": 0}
         
         win = battle.won
@@ -237,5 +251,20 @@ class RealBattleSimulator(BattleSimulator):
         
         return win, survivors, metrics
 
+    async def _delayed_challenge(self, target, delay: float = 0.5):
+        await asyncio.sleep(delay) # Let reset() start accepting challenges first
+        logger.debug("Challenge Trigger: Sending challenge on loop %s", id(self.thread_loop))
+        await self.opponent.battle_against(target, n_battles=1)
+
+    def _log_challenge_error(self, future):
+        try:
+            future.result()
+            logger.debug("Challenge Future Completed Successfully.")
+        except Exception as e:
+            err_msg = f"Async challenge failed: {repr(e)}\n{traceback.format_exc()}"
+            logger.error(err_msg)
+            with open("sim_error.log", "a") as f:
+                f.write(err_msg + "\n")
+
     def _specs_to_team_str(self, specs: List[PokemonSpec]) -> str:
         return "\n\n".join([s.to_showdown_format() for s in specs])
@@ -20,10 +20,12 @@ class RadicalRedPlayer(Player):
         
     def choose_move(self, battle: AbstractBattle) -> BattleOrder:
         # Update Anti-Abuse Counter
-        if battle.opponent_active_pokemon:
-            if self.last_opponent_mon and self.last_opponent_mon != battle.opponent_active_pokemon:
+        # (active_pokemon / opponent_active_pokemon scan the team on every access)
+        opponent = battle.opponent_active_pokemon
+        if opponent:
+            if self.last_opponent_mon and self.last_opponent_mon != opponent:
                 self.anti_abuse_counter += 3
-            self.last_opponent_mon = battle.opponent_active_pokemon
+            self.last_opponent_mon = opponent
             
         self.anti_abuse_counter = max(0, self.anti_abuse_counter - 1)
         
@@ -144,6 +146,7 @@ class RadicalRedPlayer(Player):
             return self.choose_random_move(battle)
             
         opponent = battle.opponent_active_pokemon
+        my_types = battle.active_pokemon.types # Looked up once, not per move
         best_move = None
         best_damage = -1
         
@@ -155,7 +158,7 @@ class RadicalRedPlayer(Player):
             # Power * STAB * Effectiveness
             power = move.base_power
             
-            stab = 1.5 if move.type in battle.active_pokemon.types else 1.0
+            stab = 1.5 if move.type in my_types else 1.0
             
             eff = 1.0
             if opponent:
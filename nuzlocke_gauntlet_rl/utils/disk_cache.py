@@ -0,0 +1,41 @@
+import logging
+import os
+import pickle
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+# Per-user cache dir: pickles are only ever loaded from a directory the
+# current user owns, never from a shared temp dir
+CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "nuzlocke")
+
+def cache_path(name: str) -> str:
+    return os.path.join(CACHE_DIR, name)
+
+def load_pickle(path: str, newer_than: float = 0.0) -> Any:
+    """
+    Returns the object pickled at `path`, or None if the file is missing, older
+    than `newer_than` (an mtime) or unreadable.
+    """
+    try:
+        if os.path.getmtime(path) < newer_than:
+            return None
+        with open(path, "rb") as f:
+            return pickle.load(f)
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        logger.warning("Ignoring unreadable cache %s: %s", path, e)
+        return None
+
+def save_pickle(path: str, obj: Any) -> None:
+    """Pickles `obj` to `path`; a failed write is logged, not raised."""
+    try:
+        os.makedirs(os.path.dirname(path), mode=0o700, exist_ok=True)
+        # Write then rename so concurrent workers never read a partial file
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            pickle.dump(obj, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+    except Exception as e:
+        logger.warning("Could not write cache %s: %s", path, e)
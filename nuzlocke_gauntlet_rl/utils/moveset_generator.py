@@ -1,25 +1,83 @@
-import random
-from typing import List, Dict, Optional
+import functools
+import logging
+import numpy as np
+from typing import List, Dict, Optional, Tuple
 from poke_env.data import GenData
+from nuzlocke_gauntlet_rl.utils.disk_cache import cache_path, load_pickle, save_pickle
 from nuzlocke_gauntlet_rl.utils.specs import PokemonSpec
 
+logger = logging.getLogger(__name__)
+
+def _gen_data_cache_path(gen: int) -> str:
+    # Keyed on the poke-env version so an upgrade never loads stale tables
+    from importlib.metadata import version, PackageNotFoundError
+    try:
+        poke_env_version = version("poke-env")
+    except PackageNotFoundError:
+        poke_env_version = "unknown"
+    return cache_path(f"gen{gen}_poke_env_{poke_env_version}.pkl")
+
+def _get_gen_data(gen: int) -> GenData:
+    """
+    Returns the process's GenData for `gen`. GenData.from_gen already keeps one
+    instance per process; the first call here loads it from the user cache dir
+    so spawned workers skip JSON parsing, and registers it with GenData so
+    poke-env's own from_gen calls get the same object.
+    """
+    if gen in GenData._gen_data_per_gen:
+        return GenData.from_gen(gen)
+    path = _gen_data_cache_path(gen)
+    gen_data = load_pickle(path)
+    if gen_data is not None:
+        return GenData._gen_data_per_gen.setdefault(gen, gen_data)
+        
+    gen_data = GenData.from_gen(gen)
+    save_pickle(path, gen_data)
+    return gen_data
+
+@functools.lru_cache(maxsize=None)
+def _get_move_tables(gen: int) -> Tuple[List[str], Dict[str, int], Dict[int, str]]:
+    """Builds the global move ID mapping once per process (0 is RESERVED/EMPTY)."""
+    # Sort keys for determinism
+    all_moves_list = sorted(_get_gen_data(gen).moves.keys())
+    move_to_id = {m: i+1 for i, m in enumerate(all_moves_list)}
+    id_to_move_map = {i+1: m for i, m in enumerate(all_moves_list)}
+    return all_moves_list, move_to_id, id_to_move_map
+
+@functools.lru_cache(maxsize=4096)
+def _to_showdown_id(text: str) -> str:
+    """Converts text to Showdown ID format (lowercase, alphanumeric only)."""
+    return "".join(filter(str.isalnum, text.lower()))
+
+def warm_caches(gen: int = 9) -> None:
+    """
+    Populates the gen data and move table caches in the calling process.
+    Call from the training main process before launching env workers so the
+    on-disk GenData cache exists. Workers are spawned, not forked, so they
+    inherit nothing in memory; only the disk cache helps them.
+    """
+    _get_move_tables(gen)
+
 class MovesetGenerator:
-    def __init__(self, gen: int = 9):
-        self.gen_data = GenData.from_gen(gen)
+    def __init__(self, gen: int = 9, seed: Optional[int] = None):
+        self.gen_data = _get_gen_data(gen)
+        # Per-instance PCG64 generator for build sampling. Without an explicit
+        # seed it is seeded from the global NumPy RNG, so set_random_seed()
+        # still makes runs reproducible
+        if seed is None:
+            seed = np.random.randint(2**32, dtype=np.uint32)
+        self._rng = np.random.default_rng(seed)
         self.learnset = self.gen_data.learnset
         self.pokedex = self.gen_data.pokedex
         self.moves = self.gen_data.moves
         
-        # Global Move ID Mapping
-        # Sort keys for determinism
-        self.all_moves_list = sorted(list(self.moves.keys()))
-        self.move_to_id = {m: i+1 for i, m in enumerate(self.all_moves_list)} # 0 is RESERVED/EMPTY
-        self.id_to_move_map = {i+1: m for i, m in enumerate(self.all_moves_list)}
+        # Global Move ID Mapping (shared across instances)
+        self.all_moves_list, self.move_to_id, self.id_to_move_map = _get_move_tables(gen)
         self.max_move_id = len(self.all_moves_list)
         
     def _to_id(self, text: str) -> str:
         """Converts text to Showdown ID format (lowercase, alphanumeric only)."""
-        return "".join(c for c in text.lower() if c.isalnum())
+        return _to_showdown_id(text)
         
     def get_move_id(self, move_name: str) -> int:
         clean_name = self._to_id(move_name)
@@ -113,7 +171,7 @@ class MovesetGenerator:
                 return list(data["learnset"].keys())
             return list(data.keys())
             
-        print(f"WARNING: No learnset found for {species} (ID: {species_id}, Base: {base_id})")
+        logger.warning("No learnset found for %s (ID: %s, Base: %s)", species, species_id, base_id)
         return []
 
     def get_learnable_moves_at_level(self, species: str, level: int, gen: int = 9) -> List[str]:
@@ -317,7 +375,7 @@ class MovesetGenerator:
             
         # Fill if needed
         remaining = [m for m in moves if m not in build and m.lower().replace(" ", "").replace("-", "") not in bad_moves]
-        random.shuffle(remaining)
+        self._rng.shuffle(remaining)
         while len(build) < 4 and remaining:
             build.append(remaining.pop())
             
@@ -327,4 +385,4 @@ class MovesetGenerator:
         """Random valid moves."""
         if len(moves) <= 4:
             return moves
-        return random.sample(moves, 4)
+        return self._rng.choice(moves, size=4, replace=False).tolist()
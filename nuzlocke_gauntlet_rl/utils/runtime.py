@@ -0,0 +1,45 @@
+import logging
+import os
+
+LOG_FORMAT = "%(asctime)s %(levelname)s %(name)s: %(message)s"
+
+def configure_logging(level: int = logging.INFO) -> None:
+    """
+    Root logging setup shared by the training scripts. Call it in __main__ and
+    again in each env factory: spawned workers don't run __main__.
+    """
+    logging.basicConfig(level=level, format=LOG_FORMAT)
+
+def configure_cuda_allocator() -> None:
+    """
+    Defaults PYTORCH_CUDA_ALLOC_CONF to expandable segments, which keep the
+    learner's CUDA allocator from fragmenting over long runs. Must be called
+    before torch is imported; an explicit user setting is kept.
+    """
+    os.environ.setdefault("PYTORCH_CUDA_ALLOC_CONF", "expandable_segments:True")
+
+def pin_worker_to_core(rank: int) -> None:
+    """
+    Limits an env worker to one torch thread on one CPU core. Workers only run
+    single-sample battle-model inference and wait on websockets, so a torch/OMP
+    pool each would leave n_envs * n_cores threads fighting over the cores.
+    The core is picked from the cores this process is allowed to run on, which
+    containers and cgroup cpusets may restrict.
+    """
+    import torch
+    torch.set_num_threads(1)
+    if hasattr(os, "sched_setaffinity"): # Linux only
+        cpus = sorted(os.sched_getaffinity(0))
+        core = {cpus[rank % len(cpus)]}
+        # sched_setaffinity pins a single thread, so pin every thread already
+        # running (e.g. poke-env's event loop, started on import); threads
+        # created later inherit the mask of the thread that creates them
+        try:
+            tids = [int(tid) for tid in os.listdir("/proc/self/task")]
+        except OSError:
+            tids = [0]
+        for tid in tids:
+            try:
+                os.sched_setaffinity(tid, core)
+            except ProcessLookupError:
+                pass # Thread exited meanwhile
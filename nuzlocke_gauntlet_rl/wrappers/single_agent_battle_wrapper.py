@@ -1,29 +1,37 @@
+import logging
 from typing import Any, Dict, Tuple, Optional
 import gymnasium as gym
 from poke_env.environment.env import PokeEnv
 
+logger = logging.getLogger(__name__)
+
 class MySingleAgentWrapper(gym.Env):
     def __init__(self, env: PokeEnv, opponent=None):
         self.env = env
         self.opponent = opponent
-        self.observation_space = list(env.observation_spaces.values())[0]
-        self.action_space = list(env.action_spaces.values())[0]
-        
+        self.observation_space = next(iter(env.observation_spaces.values()))
+        self.action_space = next(iter(env.action_spaces.values()))
+
+        # Cache agent id and reuse the action dict across steps
+        self._agent_id = env.agents[0] if env.agents else None
+        self._action_dict: Dict[str, Any] = {}
+
     def reset(self, seed=None, options=None):
-        print("MySingleAgentWrapper.reset called", flush=True)
+        logger.debug("MySingleAgentWrapper.reset called")
         obs, infos = self.env.reset(seed=seed, options=options)
-        agent_id = self.env.agents[0]
-        return obs[agent_id], infos[agent_id]
-        
+        # Agent IDs can change between episodes, refresh here
+        self._agent_id = self.env.agents[0]
+        return obs[self._agent_id], infos[self._agent_id]
+
     def step(self, action):
         # We only care about agent1
-        actions = {
-            self.env.agents[0]: action,
-        }
-        
+        agent_id = self._agent_id
+        actions = self._action_dict
+        actions.clear()
+        actions[agent_id] = action
+
         obs, rewards, terms, truncs, infos = self.env.step(actions)
-        
-        agent_id = self.env.agents[0]
+
         return (
             obs[agent_id],
             rewards[agent_id],
@@ -31,9 +39,9 @@ class MySingleAgentWrapper(gym.Env):
             truncs[agent_id],
             infos[agent_id],
         )
-        
+
     def render(self, mode="human"):
         return self.env.render(mode)
-        
+
     def close(self):
         self.env.close()
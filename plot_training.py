@@ -1,6 +1,7 @@
 import os
 import argparse
 import matplotlib.pyplot as plt
+import numpy as np
 import pandas as pd
 from tensorboard.backend.event_processing.event_accumulator import EventAccumulator
 
@@ -21,46 +22,28 @@ def plot_metrics(log_dir: str, output_file: str = "training_plot.png"):
         
     print(f"Found {len(event_files)} event files. Parsing...")
     
-    # Data containers
-    steps = []
-    rewards = []
-    win_rates = []
-    avg_turns = []
-    
-    for event_file in event_files:
-        ea = EventAccumulator(event_file)
-        ea.Reload()
-        
-        # Extract scalars
-        if "rollout/ep_rew_mean" in ea.Tags()["scalars"]:
-            for e in ea.Scalars("rollout/ep_rew_mean"):
-                steps.append(e.step)
-                rewards.append(e.value)
-                
-        if "custom/win_rate" in ea.Tags()["scalars"]:
-            # We might need to align steps if they differ
-            # For simplicity, let's just plot what we have
-            pass
-            
-    # Better approach: Use a DataFrame for each metric and merge/plot
-    # Since we might have multiple runs or restarts, plotting them all might be messy.
-    # Let's focus on the most recent run or aggregate.
-    
-    # Actually, let's just plot the raw data points we find
+    # Parse each event file once and collect every tag we plot
+    # size_guidance scalars=0 keeps all points instead of the default 10k reservoir sample
     data = {}
     
     for event_file in event_files:
-        ea = EventAccumulator(event_file)
+        ea = EventAccumulator(event_file, size_guidance={"scalars": 0})
         ea.Reload()
         tags = ea.Tags()["scalars"]
         
         for tag in ["rollout/ep_rew_mean", "custom/win_rate", "custom/avg_turns", "custom/pokemon_fainted", "custom/opponent_fainted"]:
             if tag in tags:
                 if tag not in data: data[tag] = {"steps": [], "values": []}
-                for e in ea.Scalars(tag):
-                    data[tag]["steps"].append(e.step)
-                    data[tag]["values"].append(e.value)
+                scalars = ea.Scalars(tag)
+                n = len(scalars)
+                data[tag]["steps"].append(np.fromiter((e.step for e in scalars), dtype=np.int64, count=n))
+                data[tag]["values"].append(np.fromiter((e.value for e in scalars), dtype=np.float32, count=n))
                     
+    # Merge per-file chunks into one array per tag
+    for series in data.values():
+        series["steps"] = np.concatenate(series["steps"])
+        series["values"] = np.concatenate(series["values"])
+        
     # Plotting
     fig, axes = plt.subplots(3, 1, figsize=(10, 15), sharex=True)
     
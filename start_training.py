@@ -1,10 +1,16 @@
+import errno
 import os
+import select
 import sys
 import subprocess
 import time
 import shutil
 import socket
 import argparse
+import logging
+import logging.handlers
+import threading
+from nuzlocke_gauntlet_rl.utils.runtime import configure_logging
 
 # ==========================================
 #        HYPERPARAMETER CONFIGURATION
@@ -24,10 +30,68 @@ GAMMA = 0.99                    # Discount Factor
 # ==========================================
 SHOWDOWN_port = 8000
 SHOWDOWN_DIR = "./pokemon-showdown" # Path to local showdown folder
+SHOWDOWN_LOG_MAX_BYTES = 50_000_000 # Rotate each server log at 50MB
+SHOWDOWN_LOG_BACKUPS = 3            # Keep at most 3 rotated logs per server
+
+# TCMalloc is preloaded into the trainer (and its env workers) when installed:
+# long-lived workers fragment glibc malloc and RSS creeps up over a run.
+# apt install libtcmalloc-minimal4
+TCMALLOC_PATHS = [
+    "/usr/lib/x86_64-linux-gnu/libtcmalloc_minimal.so.4",
+    "/usr/lib/x86_64-linux-gnu/libtcmalloc.so.4",
+    "/usr/lib/aarch64-linux-gnu/libtcmalloc_minimal.so.4",
+]
+
+def is_port_open_many(ports, timeout=0.1):
+    """Returns the set of ports accepting connections, probed concurrently with one select()."""
+    pending = {}
+    for port in ports:
+        s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        s.setblocking(False)
+        err = s.connect_ex(('localhost', port))
+        if err in (0, errno.EINPROGRESS, errno.EWOULDBLOCK):
+            pending[s] = port
+        else:
+            s.close()
+            
+    ready = set()
+    try:
+        if pending:
+            _, writable, _ = select.select([], list(pending), [], timeout)
+            for s in writable:
+                if s.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR) == 0:
+                    ready.add(pending[s])
+    finally:
+        for s in pending:
+            s.close()
+    return ready
 
 def is_port_open(port):
-    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
-        return s.connect_ex(('localhost', port)) == 0
+    return port in is_port_open_many([port])
+
+def pipe_to_rotating_log(stream, port):
+    """Copies a server's stdout into a size-capped rotating log file."""
+    log = logging.getLogger(f"showdown.{port}")
+    log.propagate = False
+    log.setLevel(logging.INFO)
+    handler = logging.handlers.RotatingFileHandler(
+        f"showdown_server_{port}.log",
+        maxBytes=SHOWDOWN_LOG_MAX_BYTES,
+        backupCount=SHOWDOWN_LOG_BACKUPS,
+    )
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    log.addHandler(handler)
+    try:
+        for line in stream:
+            # Keep draining whatever happens: if this thread stops, the pipe
+            # fills and the server blocks writing to stdout
+            try:
+                log.info(line.rstrip("\n"))
+            except Exception as e:
+                print(f"⚠️  Could not log Showdown output on port {port}: {e}")
+    finally:
+        log.removeHandler(handler)
+        handler.close()
 
 def start_showdown(start_port=8000, n_servers=4):
     processes = []
@@ -45,13 +109,16 @@ def start_showdown(start_port=8000, n_servers=4):
                 
             print(f"🚀 Launching server on {port}...")
             try:
-                log_file = open(f"showdown_server_{port}.log", "w")
                 proc = subprocess.Popen(
                     [node_cmd, "pokemon-showdown", str(port)], 
                     cwd=SHOWDOWN_DIR,
-                    stdout=log_file,
-                    stderr=subprocess.STDOUT
+                    stdout=subprocess.PIPE,
+                    stderr=subprocess.STDOUT,
+                    text=True,
+                    errors="replace", # A bad byte must not kill the log reader
+                    bufsize=1
                 )
+                threading.Thread(target=pipe_to_rotating_log, args=(proc.stdout, port), daemon=True).start()
                 processes.append(proc)
             except Exception as e:
                 print(f"❌ Failed to start server on {port}: {e}")
@@ -61,24 +128,42 @@ def start_showdown(start_port=8000, n_servers=4):
 
     # 2. Wait for Ports to be Ready
     print("Waiting for servers to be ready...")
+    ports = [start_port + i for i in range(n_servers)]
     ready = False
+    last_count = None
     while not ready:
-        open_count = 0
-        for i in range(n_servers):
-            port = start_port + i
-            if is_port_open(port):
-                open_count += 1
+        open_count = len(is_port_open_many(ports))
         
         if open_count == n_servers:
             ready = True
             print("✅ All servers ready!")
         else:
-            print(f"⏳ Waiting... ({open_count}/{n_servers} ready). Start them manually!")
-            time.sleep(3)
+            # Polling is cheap now, only report when the count changes
+            if open_count != last_count:
+                print(f"⏳ Waiting... ({open_count}/{n_servers} ready). Start them manually!")
+                last_count = open_count
+            time.sleep(0.25)
         
     return processes
 
-def run_training():
+def training_env():
+    """Environment for the trainer process, with TCMalloc preloaded if found."""
+    env = os.environ.copy()
+    if "LD_PRELOAD" in env:
+        return env # Respect an explicit user preload
+    for path in TCMALLOC_PATHS:
+        if os.path.exists(path):
+            print(f"✅ Using TCMalloc ({path})")
+            env["LD_PRELOAD"] = path
+            break
+    return env
+
+def run_training(replace_process: bool = False):
+    """
+    Launches train_manager.py. With replace_process=True the current
+    interpreter is replaced via os.execvp (no idle parent, direct Ctrl-C);
+    only safe when this process owns no child servers to clean up.
+    """
     # Construct command
     # We explicitly use 'uv run' to ensure we use the virtual environment
     cmd = [
@@ -100,20 +185,32 @@ def run_training():
     print(f"Steps:    {TOTAL_STEPS}")
     print("========================================\n")
     
+    env = training_env()
+    
+    if replace_process:
+        sys.stdout.flush()
+        sys.stderr.flush()
+        os.execvpe(cmd[0], cmd, env)
+    
     try:
-        subprocess.run(cmd, check=True)
+        subprocess.run(cmd, check=True, env=env)
     except KeyboardInterrupt:
         print("\n🛑 Training interrupted by user.")
     except subprocess.CalledProcessError as e:
         print(f"\n❌ Training failed with exit code {e.returncode}")
 
 if __name__ == "__main__":
+    configure_logging()
+
     # Check Server
     server_proc_list = start_showdown(n_servers=4)
     
     try:
         # Run Training
-        run_training()
+        # If every server was already running we own nothing, so hand the
+        # process over to the trainer. Otherwise stay alive to pump server
+        # logs and stop the servers afterwards (exec would skip both).
+        run_training(replace_process=not server_proc_list)
     finally:
         # Cleanup
         if server_proc_list:
@@ -1,128 +1,136 @@
 import argparse
+import logging
 import os
 import numpy as np
 import uuid
+from nuzlocke_gauntlet_rl.utils.runtime import configure_cuda_allocator, configure_logging, pin_worker_to_core
+configure_cuda_allocator() # Before SB3 pulls in torch
 from stable_baselines3 import PPO
+from stable_baselines3.common.vec_env import SubprocVecEnv, DummyVecEnv, VecMonitor, VecFrameStack
 from poke_env.player import RandomPlayer
 from poke_env import ServerConfiguration, AccountConfiguration
 from nuzlocke_gauntlet_rl.envs.battle_env import BattleEnv
 from nuzlocke_gauntlet_rl.wrappers.single_agent_battle_wrapper import MySingleAgentWrapper
 
-def train_battle_agent(steps: int, model_name: str, server_url: str = "ws://192.168.1.122:8000/showdown/websocket"):
-    # Ensure models directory exists
-    os.makedirs("models", exist_ok=True)
-    
-    server_config = ServerConfiguration(server_url, None)
-    
-    # Create unique IDs
-    agent_name = f"TrainAgent_{uuid.uuid4().hex[:8]}"
-    opponent_name = f"TrainOpp_{uuid.uuid4().hex[:8]}"
-    
-    print(f"Initializing Battle Agent Training (Agent: {agent_name}, Opponent: {opponent_name})...", flush=True)
+logger = logging.getLogger(__name__)
+
+def make_env(rank: int, server_host: str, n_servers: int = 4, pin_worker: bool = False):
+    def _init():
+        configure_logging()
+        
+        if pin_worker:
+            pin_worker_to_core(rank)
+        
+        # Distribute across n_servers (ports 8000 to 8000+n-1)
+        port = 8000 + (rank % n_servers)
+        server_config = ServerConfiguration(f"ws://{server_host}:{port}/showdown/websocket", None)
+        
+        # Create unique IDs
+        agent_name = f"TrainAgent_{uuid.uuid4().hex[:8]}"
+        opponent_name = f"TrainOpp_{uuid.uuid4().hex[:8]}"
     
-    # Initialize Opponent
-    from nuzlocke_gauntlet_rl.players.radical_red_player import RadicalRedPlayer
-    opponent = RadicalRedPlayer(
-        battle_format="gen9customgame",
-        server_configuration=server_config,
-        account_configuration=AccountConfiguration(opponent_name, None),
-    )
+        logger.info("Initializing battle env %d on port %d (Agent: %s, Opponent: %s)...", rank, port, agent_name, opponent_name)
     
-    # Initialize BattleEnv
-    pz_env = BattleEnv(
-        battle_format="gen9customgame",
-        server_configuration=server_config,
-        account_configuration1=AccountConfiguration(agent_name, None),
-    )
+        # Initialize Opponent
+        from nuzlocke_gauntlet_rl.players.radical_red_player import RadicalRedPlayer
+        opponent = RadicalRedPlayer(
+            battle_format="gen9customgame",
+            server_configuration=server_config,
+            account_configuration=AccountConfiguration(opponent_name, None),
+        )
     
-    # Wrap for Gym
-    env = MySingleAgentWrapper(pz_env, opponent=opponent)
+        # Initialize BattleEnv
+        pz_env = BattleEnv(
+            battle_format="gen9customgame",
+            server_configuration=server_config,
+            account_configuration1=AccountConfiguration(agent_name, None),
+        )
     
-    # Challenge Trigger Thread
-    import threading
-    import time
-    import asyncio
+        # Wrap for Gym
+        env = MySingleAgentWrapper(pz_env, opponent=opponent)
     
-    def challenge_loop():
-        print("Challenge loop started.", flush=True)
-        # Wait for login
-        time.sleep(5)
+        # Challenge Trigger
+        # One persistent coroutine on poke-env's loop keeps exactly one challenge
+        # in flight: battle_against() only returns once the battle has finished,
+        # so the next challenge is sent immediately instead of polling every 5s.
+        import asyncio
+        from poke_env.concurrency import POKE_LOOP
         
-        while True:
-            # Check if we need to trigger a challenge
-            # We can just try to challenge periodically.
-            # If a battle is active, it might be ignored or queued.
-            # But we need to be careful not to spam too much.
+        async def trigger_loop():
+            # Both websocket handshakes run concurrently; wait for both
+            await asyncio.gather(
+                opponent.ps_client.logged_in.wait(),
+                pz_env.agent1.ps_client.logged_in.wait(),
+            )
+            logger.info("Challenge loop started.")
             
-            # Ideally we check if pz_env is reset and waiting.
-            # But we don't have easy access to that state from here safely.
-            
-            # Just try to challenge every 10 seconds?
-            # Or better: check if opponent is battling.
-            
-            try:
-                # We need a new loop for the thread
-                loop = asyncio.new_event_loop()
-                asyncio.set_event_loop(loop)
-                
-                async def trigger():
-                    if not opponent.ps_client.logged_in.is_set():
-                        await opponent.ps_client.logged_in.wait()
-                        
-                    # Check if opponent has active battles
-                    # This is tricky to check from outside.
-                    # But we can just send a challenge.
-                    # print("Sending challenge...", flush=True)
+            while True:
+                try:
                     await opponent.battle_against(pz_env.agent1, n_battles=1)
+                except Exception as e:
+                    logger.warning("Challenge trigger error: %s", e)
+                    # Back off so a dead server doesn't turn this into a hot loop
+                    await asyncio.sleep(5)
                     
-                loop.run_until_complete(trigger())
-                loop.close()
-                
-            except Exception as e:
-                print(f"Challenge trigger error: {e}", flush=True)
-                
-            # Wait a bit before next check/challenge
-            # A battle takes some time.
-            time.sleep(5)
-            
-    t = threading.Thread(target=challenge_loop, daemon=True)
-    t.start()
+        asyncio.run_coroutine_threadsafe(trigger_loop(), POKE_LOOP)
+        
+        return env
+    return _init
+
+def train_battle_agent(steps: int, model_name: str, n_envs: int = 4, server_host: str = "192.168.1.122", n_servers: int = 4, n_stack: int = 4):
+    # Ensure models directory exists
+    os.makedirs("models", exist_ok=True)
+    
+    logger.info("Initializing %d battle environments...", n_envs)
+    
+    # Each worker logs in as its own agent/opponent pair on its own server
+    env_fns = [make_env(i, server_host, n_servers, pin_worker=n_envs > 1) for i in range(n_envs)]
+    
+    if n_envs > 1:
+        env = SubprocVecEnv(env_fns, start_method="spawn")
+    else:
+        env = DummyVecEnv(env_fns)
+    env = VecMonitor(env)
+    
+    # Frame-stack the last n_stack observations so a plain MLP sees recent
+    # history (replaces the LSTM of RecurrentPPO, which was the learner bottleneck)
+    env = VecFrameStack(env, n_stack=n_stack)
     
     # Initialize Agent
-    print(f"Initializing RecurrentPPO Battle Agent...", flush=True)
-    try:
-        from sb3_contrib import RecurrentPPO
-    except ImportError:
-        print("Error: sb3-contrib not installed. Please install it to use RecurrentPPO.")
-        return
-
-    model = RecurrentPPO("MlpLstmPolicy", env, verbose=1, tensorboard_log="./tmp/battle_agent/")
+    logger.info("Initializing PPO Battle Agent (MlpPolicy, n_stack=%d)...", n_stack)
+    model = PPO("MlpPolicy", env, verbose=1, tensorboard_log="./tmp/battle_agent/")
     
     # Check if model exists to resume
     model_path = f"models/{model_name}"
     if os.path.exists(f"{model_path}.zip"):
-        print(f"Loading existing battle model from {model_path}...", flush=True)
-        model = RecurrentPPO.load(model_path, env=env)
+        logger.info("Loading existing battle model from %s...", model_path)
+        model = PPO.load(model_path, env=env)
     
-    print(f"Starting training for {steps} steps...", flush=True)
+    logger.info("Starting training for %d steps...", steps)
     try:
         model.learn(total_timesteps=steps, progress_bar=True)
-        print("Training complete.", flush=True)
+        logger.info("Training complete.")
     except KeyboardInterrupt:
-        print("Training interrupted.", flush=True)
+        logger.info("Training interrupted.")
     finally:
-        print(f"Saving battle model to {model_path}...", flush=True)
+        logger.info("Saving battle model to %s...", model_path)
         model.save(model_path)
-        print("Model saved.", flush=True)
+        logger.info("Model saved.")
         
-        # Close environment
-        # env.close() # Player doesn't have close
+        # Close environment (shuts down SubprocVecEnv workers)
+        env.close()
 
 if __name__ == "__main__":
+    configure_logging()
+
     parser = argparse.ArgumentParser(description="Train the Nuzlocke Battle Agent")
     parser.add_argument("--steps", type=int, default=10000, help="Number of training steps")
-    parser.add_argument("--model", type=str, default="ppo_risk_agent_lstm_v1", help="Name of the battle agent model")
+    parser.add_argument("--model", type=str, default="ppo_risk_agent_fs_v1", help="Name of the battle agent model")
+    parser.add_argument("--n_envs", type=int, default=4, help="Number of parallel battle environments")
+    parser.add_argument("--server_host", type=str, default="192.168.1.122", help="Host running the Showdown servers")
+    parser.add_argument("--n_servers", type=int, default=4, help="Number of Showdown servers (ports 8000+)")
+    parser.add_argument("--n_stack", type=int, default=4, help="Number of stacked observation frames")
     
     args = parser.parse_args()
     
-    train_battle_agent(args.steps, args.model)
+    train_battle_agent(args.steps, args.model, args.n_envs, args.server_host, args.n_servers, args.n_stack)
@@ -1,19 +1,29 @@
 
 import argparse
+import logging
 import os
 import sys
 import numpy as np
+from nuzlocke_gauntlet_rl.utils.runtime import configure_cuda_allocator, configure_logging, pin_worker_to_core
+configure_cuda_allocator() # Before SB3 pulls in torch
 from stable_baselines3 import PPO
 from stable_baselines3.common.vec_env import SubprocVecEnv, DummyVecEnv
-from stable_baselines3.common.callbacks import CheckpointCallback
 from stable_baselines3.common.utils import set_random_seed
+from nuzlocke_gauntlet_rl.callbacks.async_checkpoint_callback import AsyncCheckpointCallback
 from nuzlocke_gauntlet_rl.callbacks.metrics_callback import MetricsCallback
 from nuzlocke_gauntlet_rl.envs.nuzlocke_env import NuzlockeGauntletEnv
 from nuzlocke_gauntlet_rl.envs.real_battle_simulator import RealBattleSimulator
 from nuzlocke_gauntlet_rl.envs.mock_battle_simulator import MockBattleSimulator
 
-def make_env(rank: int, seed: int, battle_model_path: str, use_mock: bool, gauntlet_name: str, n_servers: int = 4):
+logger = logging.getLogger(__name__)
+
+def make_env(rank: int, seed: int, battle_model_path: str, use_mock: bool, gauntlet_name: str, n_servers: int = 4, pin_worker: bool = False):
     def _init():
+        configure_logging()
+        
+        if pin_worker:
+            pin_worker_to_core(rank)
+        
         # Distribute across n_servers (ports 8000 to 8000+n-1)
         port = 8000 + (rank % n_servers)
         ws_url = f"ws://localhost:{port}/showdown/websocket"
@@ -35,26 +45,53 @@ def make_env(rank: int, seed: int, battle_model_path: str, use_mock: bool, gaunt
     set_random_seed(seed)
     return _init
 
+def get_latest_checkpoint(model_dir: str, prefix: str):
+    """Returns the path of the highest-step CheckpointCallback zip (<prefix>_<steps>_steps.zip), or None."""
+    best_steps, best_path = -1, None
+    pref = prefix + "_"
+    suffix = "_steps.zip"
+    try:
+        with os.scandir(model_dir) as it:
+            for entry in it:
+                name = entry.name
+                if not (name.startswith(pref) and name.endswith(suffix)):
+                    continue
+                try:
+                    steps = int(name[len(pref):-len(suffix)])
+                except ValueError:
+                    continue
+                if steps > best_steps:
+                    best_steps, best_path = steps, entry.path
+    except FileNotFoundError:
+        return None
+    return best_path
+
 def train_manager(steps: int, model_name: str, battle_model_path: str, use_mock: bool = False, gauntlet_name: str = "kanto_leaders", n_envs: int = 1, n_steps_per_update: int = 2048, learning_rate: float = 3e-4, batch_size: int = 64, ent_coef: float = 0.0):
     os.makedirs("models", exist_ok=True)
     
-    print(f"Initializing {n_envs} environments (Gauntlet={gauntlet_name}, MaskablePPO)...", flush=True)
+    logger.info("Initializing %d environments (Gauntlet=%s, MaskablePPO)...", n_envs, gauntlet_name)
     
     # Check dependencies
     try:
         from sb3_contrib import MaskablePPO
     except ImportError:
-        print("Error: sb3-contrib is required for Action Masking. Please install it.")
+        logger.error("sb3-contrib is required for Action Masking. Please install it.")
         sys.exit(1)
         
-    env_fns = [make_env(i, 42, battle_model_path, use_mock, gauntlet_name) for i in range(n_envs)]
+    # Build gen data + move tables once here so workers load the cached copy
+    # instead of all parsing the JSON at the same time
+    from nuzlocke_gauntlet_rl.utils.moveset_generator import warm_caches
+    warm_caches()
+    
+    # Only pin subprocess workers; with DummyVecEnv the env lives in the learner process
+    env_fns = [make_env(i, 42, battle_model_path, use_mock, gauntlet_name, pin_worker=n_envs > 1) for i in range(n_envs)]
     
     if n_envs > 1:
         env = SubprocVecEnv(env_fns, start_method="spawn")
     else:
         env = DummyVecEnv(env_fns)
     
-    print(f"Initializing MaskablePPO Manager Agent (lr={learning_rate}, batch={batch_size}, ent={ent_coef})...", flush=True)
+    logger.info("Initializing MaskablePPO Manager Agent (lr=%s, batch=%s, ent=%s)...", learning_rate, batch_size, ent_coef)
     model = MaskablePPO(
         "MultiInputPolicy", 
         env, 
@@ -67,7 +104,8 @@ def train_manager(steps: int, model_name: str, battle_model_path: str, use_mock:
     )
     
     # Callbacks
-    checkpoint_callback = CheckpointCallback(save_freq=1000, save_path=f"./models/{model_name}_checkpoints", name_prefix=model_name)
+    # Checkpoints are written in the background so disk I/O doesn't stall rollouts
+    checkpoint_callback = AsyncCheckpointCallback(save_freq=1000, save_path=f"./models/{model_name}_checkpoints", name_prefix=model_name)
     metrics_callback = MetricsCallback()
     
     from nuzlocke_gauntlet_rl.callbacks.rich_dashboard import RichDashboardCallback
@@ -76,22 +114,41 @@ def train_manager(steps: int, model_name: str, battle_model_path: str, use_mock:
     callbacks = [checkpoint_callback, metrics_callback, dashboard_callback]
     
     model_path = f"models/{model_name}"
+    resumed = False
     if os.path.exists(f"{model_path}.zip"):
-        print(f"Loading existing manager model from {model_path}...", flush=True)
+        logger.info("Loading existing manager model from %s...", model_path)
         model = MaskablePPO.load(model_path, env=env)
+        resumed = True
+    else:
+        # No final save (e.g. crashed run): resume from the newest checkpoint
+        latest = get_latest_checkpoint(f"./models/{model_name}_checkpoints", model_name)
+        if latest:
+            logger.info("Resuming manager model from checkpoint %s...", latest)
+            model = MaskablePPO.load(latest, env=env)
+            resumed = True
     
-    print(f"Starting training for {steps} steps...", flush=True)
+    logger.info("Starting training for %d steps...", steps)
     try:
-        model.learn(total_timesteps=steps, callback=callbacks, progress_bar=False) # False bar because using Rich Dashboard
-        print("Training complete.", flush=True)
+        # A loaded model keeps counting timesteps, so checkpoint names keep
+        # rising across resumes and the highest step is always the newest
+        model.learn(total_timesteps=steps, callback=callbacks, progress_bar=False, reset_num_timesteps=not resumed) # False bar because using Rich Dashboard
+        logger.info("Training complete.")
     except KeyboardInterrupt:
-        print("Training interrupted.", flush=True)
+        logger.info("Training interrupted.")
     finally:
-        print(f"Saving manager model to {model_path}...", flush=True)
+        # Let an in-flight checkpoint finish before the final synchronous save.
+        # A failed checkpoint write must not cost the final model.
+        try:
+            checkpoint_callback.wait()
+        except Exception as e:
+            logger.error("Background checkpoint write failed: %s", e)
+        logger.info("Saving manager model to %s...", model_path)
         model.save(model_path)
         env.close()
 
 if __name__ == "__main__":
+    configure_logging()
+
     parser = argparse.ArgumentParser(description="Train the Nuzlocke Manager Agent")
     parser.add_argument("--steps", type=int, default=1000, help="Number of training steps")
     parser.add_argument("--model_name", type=str, default="ppo_manager_v4", help="Name of the model to save/load")
@@ -1,66 +1,243 @@
 import argparse
 import os
+import sys
+import time
 import numpy as np
+import torch
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from stable_baselines3 import PPO
 from nuzlocke_gauntlet_rl.envs.nuzlocke_env import NuzlockeGauntletEnv
-from nuzlocke_gauntlet_rl.envs.real_battle_simulator import RealBattleSimulator
+from nuzlocke_gauntlet_rl.envs.real_battle_simulator import RealBattleSimulator, load_battle_model
 
-def watch_agent(model_name: str, battle_model_path: str, gauntlet_name: str = "kanto_leaders"):
-    # Ensure models directory exists
-    if not os.path.exists(f"models/{model_name}.zip"):
-        print(f"Error: Model models/{model_name}.zip not found.")
+SEP = "=" * 60 # Banner rule
+
+def alloc_obs_batch(observation_space, n_envs: int):
+    """One preallocated (n_envs, ...) buffer per Dict observation key, in the space's own dtype."""
+    return {key: np.empty((n_envs,) + space.shape, dtype=space.dtype) for key, space in observation_space.spaces.items()}
+
+def stack_obs(obs_list, out):
+    """Copies per-env Dict observations into the `out` buffers and returns the filled views for model.predict."""
+    n = len(obs_list)
+    for key, buf in out.items():
+        for j, obs in enumerate(obs_list):
+            buf[j] = obs[key]
+    return {key: buf[:n] for key, buf in out.items()}
+
+def predict_actions(predict_fn, obs_batch, device):
+    """
+    Deterministic actions for a batched Dict observation, calling policy._predict
+    (or its compiled version) directly. Skips model.predict's per-call wrapper
+    (vectorization checks, reshaping, action clipping), none of which a Discrete
+    action space needs.
+    """
+    obs_tensor = {key: torch.as_tensor(obs, device=device) for key, obs in obs_batch.items()}
+    return predict_fn(obs_tensor, deterministic=True).cpu().numpy()
+
+class TrajectoryLog:
+    """
+    One episode's observations/actions/rewards in preallocated arrays (doubled
+    when full), saved with a single np.savez_compressed at episode end instead
+    of printing or writing every step.
+    """
+    def __init__(self, observation_space, capacity: int = 256):
+        self.t = 0
+        self.obs = {key: np.empty((capacity,) + space.shape, dtype=space.dtype) for key, space in observation_space.spaces.items()}
+        self.actions = np.empty(capacity, dtype=np.int32)
+        self.rewards = np.zeros(capacity, dtype=np.float32)
+
+    def add(self, obs, action):
+        if self.t == len(self.actions):
+            self.obs = {key: np.concatenate([buf, np.empty_like(buf)]) for key, buf in self.obs.items()}
+            self.actions = np.concatenate([self.actions, np.empty_like(self.actions)])
+            self.rewards = np.concatenate([self.rewards, np.zeros_like(self.rewards)])
+        for key, buf in self.obs.items():
+            buf[self.t] = obs[key]
+        self.actions[self.t] = action
+        self.t += 1
+
+    def set_last_reward(self, reward: float):
+        self.rewards[self.t - 1] = reward
+
+    def save(self, path: str):
+        t = self.t
+        np.savez_compressed(
+            path,
+            actions=self.actions[:t],
+            rewards=self.rewards[:t],
+            **{f"obs_{key}": buf[:t] for key, buf in self.obs.items()}
+        )
+
+def episode_banner(episode: int, progress: int, survivors: int, reward: float, max_trainers: int) -> str:
+    win = progress >= max_trainers
+    return (
+        f"\n{SEP}\n"
+        f"Episode {episode + 1} Finished!\n"
+        f"Result: {'VICTORY' if win else 'DEFEAT'}\n"
+        f"Progress: Trainer {progress}/{max_trainers}\n"
+        f"Survivors: {survivors}\n"
+        f"Total Reward: {reward:.2f}\n"
+        f"{SEP}\n\n"
+    )
+
+def watch_agent(model_name: str, battle_model_path: str, gauntlet_name: str = "kanto_leaders", n_envs: int = 1, device: str = "cpu", trajectory_dir: str = None, n_episodes: int = None, compile_policy: bool = False):
+    if n_envs < 1 or (n_episodes is not None and n_episodes < 1):
+        print("Error: --n_envs and --n_episodes must be at least 1.")
+        return
+
+    # Checked up front so a typo fails before the battle model and simulators load
+    model_path = f"models/{model_name}.zip"
+    if not os.path.exists(model_path):
+        print(f"Error: Model {model_path} not found.")
         return
 
-    print(f"Initializing RealBattleSimulator with model: {battle_model_path}...", flush=True)
-    simulator = RealBattleSimulator(model_path=battle_model_path)
-    
-    print(f"Initializing NuzlockeGauntletEnv with gauntlet: {gauntlet_name} (Watch Mode)...", flush=True)
-    # Enable Watch Mode
-    env = NuzlockeGauntletEnv(simulator=simulator, gauntlet_name=gauntlet_name, watch_mode=True)
-    
+    # n_episodes gauntlets are played n_envs at a time; a finished env starts
+    # the next episode until all are done
+    if n_episodes is None:
+        n_episodes = n_envs
+    n_envs = min(n_envs, n_episodes)
+
+    if device == "cpu":
+        # Batch-1..n_envs MLP forwards: a single intra-op thread beats spinning up a pool
+        torch.set_num_threads(1)
+
+    # Load the battle agent once; every simulator predicts with the same
+    # weights (they share this process), instead of one copy per env
+    battle_model = load_battle_model(battle_model_path, device)
+
+    envs = []
+    for i in range(n_envs):
+        print(f"Initializing RealBattleSimulator {i + 1}/{n_envs} with model: {battle_model_path}...", flush=True)
+        simulator = RealBattleSimulator(model_path=battle_model_path, device=device, battle_model=battle_model)
+
+        print(f"Initializing NuzlockeGauntletEnv with gauntlet: {gauntlet_name} (Watch Mode)...", flush=True)
+        # Enable Watch Mode on the first env only, the others play silently
+        envs.append(NuzlockeGauntletEnv(simulator=simulator, gauntlet_name=gauntlet_name, watch_mode=(i == 0)))
+    env = envs[0]
+    max_trainers = len(env.gauntlet_template.trainers) # Same gauntlet for every env
+
     # Load Model
-    print(f"Loading manager model from models/{model_name}...", flush=True)
-    model = PPO.load(f"models/{model_name}", env=env)
-    
-    print(f"\n{'='*60}")
+    print(f"Loading manager model from {model_path} (device={device})...", flush=True)
+    # Opened and loaded in one block so the handle can't leak
+    with open(model_path, "rb") as model_file:
+        model = PPO.load(model_file, env=env, device=device)
+    policy = model.policy
+    policy.set_training_mode(False) # eval mode once, not per predict
+    predict_fn = policy._predict
+    if compile_policy:
+        # Specialized to one input shape: every predict below is fed the full
+        # (n_envs, ...) batch buffers, so there are no dynamic-shape guards or
+        # recompiles when the number of ready envs changes
+        print("Compiling manager policy (dynamic=False)...", flush=True)
+        mode = "reduce-overhead" if policy.device.type == "cuda" else None # CUDA graphs only help on GPU
+        predict_fn = torch.compile(policy._predict, dynamic=False, mode=mode)
+
+    print(f"\n{SEP}")
     print(f"WATCH MODE STARTED")
-    print(f"The agent will play 1 episode.")
-    print(f"When a battle starts, a URL will appear below.")
+    print(f"The agent will play {n_episodes} episode(s), {n_envs} in parallel.")
+    print(f"When a battle starts in the first env, a URL will appear below.")
     print(f"Click the URL to watch the battle in your browser.")
-    print(f"{'='*60}\n", flush=True)
-    
-    obs, info = env.reset()
-    done = False
-    truncated = False
-    episode_reward = 0
-    
-    while not (done or truncated):
-        action, _ = model.predict(obs, deterministic=True)
-        obs, reward, done, truncated, info = env.step(action)
-        episode_reward += reward
-        
-    # Episode finished
-    progress = env.current_trainer_idx
-    max_trainers = len(env.gauntlet_template.trainers)
-    win = progress >= max_trainers
-    survivors = len([m for m in env.roster if m.alive])
-    
-    print(f"\n{'='*60}")
-    print(f"Episode Finished!")
-    print(f"Result: {'VICTORY' if win else 'DEFEAT'}")
-    print(f"Progress: Trainer {progress}/{max_trainers}")
-    print(f"Survivors: {survivors}")
-    print(f"Total Reward: {episode_reward:.2f}")
-    print(f"{'='*60}\n", flush=True)
-    
-    env.close()
+    print(f"{SEP}\n", flush=True)
+
+    obs = [e.reset()[0] for e in envs]
+    episode_rewards = np.zeros(n_envs)
+    episode_ids = list(range(n_envs)) # Episode each env is currently playing
+    next_episode = n_envs
+    results = [] # (episode, progress, survivors, reward) per finished episode
+    run_id = time.strftime("%Y%m%d-%H%M%S")
+    # Reused every step instead of np.stack allocating a fresh batch per key
+    obs_batch = alloc_obs_batch(env.observation_space, n_envs)
+    trajectories = None
+    if trajectory_dir:
+        os.makedirs(trajectory_dir, exist_ok=True)
+        trajectories = [TrajectoryLog(env.observation_space) for _ in range(n_envs)]
+
+    # A step that fights blocks on the Showdown websocket for the whole battle,
+    # so env steps run on a thread pool. Instead of waiting for every env each
+    # step (lockstep), whichever envs have returned get their next actions from
+    # one batched predict and are sent straight back, so team building in one
+    # env is never stuck behind a battle in another.
+    # Nothing is trained here, so predicts run under inference_mode (no
+    # autograd/version-counter bookkeeping; thread-local, the simulators'
+    # battle loops enter it themselves).
+    with ThreadPoolExecutor(max_workers=n_envs) as pool, torch.inference_mode():
+        if compile_policy:
+            # Warm up (compile) here, inside inference_mode, so the loop hits the cached graph
+            predict_actions(predict_fn, stack_obs(obs, obs_batch), policy.device)
+
+        ready = list(range(n_envs))
+        pending = {}
+        while ready or pending:
+            if ready:
+                batch = stack_obs([obs[i] for i in ready], obs_batch)
+                if compile_policy:
+                    # Fixed shape: rows past len(ready) hold stale obs, their actions are dropped
+                    batch = obs_batch
+                actions = predict_actions(predict_fn, batch, policy.device)[:len(ready)]
+                for i, action in zip(ready, actions):
+                    if trajectories:
+                        trajectories[i].add(obs[i], action)
+                    pending[pool.submit(envs[i].step, action)] = i
+
+            done_futures, _ = wait(pending, return_when=FIRST_COMPLETED)
+            ready = []
+            for future in done_futures:
+                i = pending.pop(future)
+                obs[i], reward, done, truncated, info = future.result()
+                episode_rewards[i] += reward
+                if trajectories:
+                    trajectories[i].set_last_reward(reward)
+                if not (done or truncated):
+                    ready.append(i)
+                    continue
+
+                # Episode finished: record it before the env is reused, and
+                # report it now (one write + flush) so long sweeps show progress
+                result = (episode_ids[i], envs[i].current_trainer_idx, envs[i].alive_count, episode_rewards[i])
+                results.append(result)
+                sys.stdout.write(episode_banner(*result, max_trainers))
+                sys.stdout.flush()
+                if trajectories:
+                    path = os.path.join(trajectory_dir, f"{model_name}_{run_id}_ep{episode_ids[i] + 1}.npz")
+                    trajectories[i].save(path)
+                    trajectories[i] = TrajectoryLog(env.observation_space)
+
+                if next_episode < n_episodes:
+                    episode_ids[i] = next_episode
+                    next_episode += 1
+                    obs[i] = envs[i].reset()[0]
+                    episode_rewards[i] = 0.0
+                    ready.append(i)
+
+    if trajectories:
+        print(f"Saved {n_episodes} trajectories to {trajectory_dir}/", flush=True)
+
+    if n_episodes > 1:
+        _, progresses, survivor_counts, rewards = (np.array(col) for col in zip(*results))
+        sys.stdout.write(
+            f"{SEP}\n"
+            f"Summary over {n_episodes} episodes ({gauntlet_name})\n"
+            f"Win Rate: {np.mean(progresses >= max_trainers):.1%}\n"
+            f"Avg Progress: {progresses.mean():.1f} / {max_trainers}\n"
+            f"Avg Survivors: {survivor_counts.mean():.1f}\n"
+            f"Avg Reward: {rewards.mean():.2f}\n"
+            f"{SEP}\n\n"
+        )
+        sys.stdout.flush()
+
+    for e in envs:
+        e.close()
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Watch the Nuzlocke Manager Agent Live")
     parser.add_argument("--model_name", type=str, default="ppo_manager_v4", help="Name of the manager model to load")
     parser.add_argument("--battle_model", type=str, default="models/ppo_risk_agent_lstm_v1", help="Path to the trained battle agent model")
     parser.add_argument("--gauntlet", type=str, default="extended", help="Name of the gauntlet")
-    
+    parser.add_argument("--n_envs", type=int, default=1, help="Number of episodes to play in parallel (battle URLs shown for the first)")
+    parser.add_argument("--device", type=str, default="cpu", help="Torch device for inference (small MLPs run fastest on cpu)")
+    parser.add_argument("--trajectory_dir", type=str, default=None, help="If set, save each episode's obs/actions/rewards there as .npz")
+    parser.add_argument("--n_episodes", type=int, default=None, help="Total episodes to play, n_envs at a time (default: n_envs); prints a summary")
+    parser.add_argument("--compile", action="store_true", help="torch.compile the manager policy for a fixed batch shape (slow first step)")
+
     args = parser.parse_args()
-    
-    watch_agent(args.model_name, args.battle_model, args.gauntlet)
+
+    watch_agent(args.model_name, args.battle_model, args.gauntlet, args.n_envs, args.device, args.trajectory_dir, args.n_episodes, args.compile)